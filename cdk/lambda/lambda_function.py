@@ -3,25 +3,65 @@ AWS Lambda関数ハンドラー - シンプルYOLOサンプル
 YOLOv8を使った物体検出のサンプル実装
 """
 
-import json
-import base64
+import ast
 import os
 import time
 from io import BytesIO
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 
+import boto3
 import cv2
 import numpy as np
 
+# 【Base64処理の高速化 後】SIMD(AVX2/SSSE3)実装のpybase64を使用（標準base64と同じAPI）
+import pybase64
+
+# 【JSONシリアライズの高速化 後】標準jsonよりも高速で、numpy型をそのままシリアライズできるorjsonを使用
+import orjson
+
+# 【ONNX Runtime推論 後】PyTorchを経由せずONNX Runtimeで推論するため
+import onnxruntime as ort
+
+from PIL import Image, features
+
 # 【YOLO推論の最適化 前】import不要
 # import torch
 # 【YOLO推論の最適化 後】torch.inference_mode()を使用するため
-import torch
-from PIL import Image
-from ultralytics import YOLO
+# import torch
+# from ultralytics import YOLO
+# from ultralytics.utils.plotting import colors
+# 【torch / ultralyticsの遅延import 後】onnxバックエンドのコールドスタートで読み込まないよう、
+# torch / ultralyticsは使用するバックエンドの関数内でimportする
+if TYPE_CHECKING:
+    import torch
+    from ultralytics import YOLO
+
+# 推論バックエンド ("onnx", "torchscript" or "ultralytics")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "onnx")
+
+# 【IPEX + BF16 後】USE_IPEX=1でIntel Extension for PyTorchによる最適化とBF16自動混合精度を有効化
+USE_IPEX = os.environ.get("USE_IPEX") == "1"
 
 # グローバル変数（コールドスタート対策）
 model = None
+predictor = None
+s3_client = None
+class_names: Dict[int, str] = {}
+class_colors: List[Tuple[int, int, int]] = []
+input_size = 640
+
+# 描画色のパレット（Ultralyticsのplotting.Colorsと同じ並び、RGBの16進表記をBGRに変換）
+PALETTE = [
+    (int(h[4:6], 16), int(h[2:4], 16), int(h[0:2], 16))
+    for h in (
+        "042AFF 0BDBEB F3F3F3 00DFB7 111F68 FF6FDD FF444F CCED00 00F344 BD00FF "
+        "00B4FF DD00BA 00FFFF 26C000 01FFB3 7D24FF 7B0068 FF1B6C FC6D2F A2FF0B"
+    ).split()
+]
+
+# 【入力バッファの再利用 後】letterbox画像と入力テンソルのバッファ（リクエスト間で使い回す）
+letterbox_buffer = None
+input_buffer = None
 
 
 def initialize_model():
@@ -29,27 +69,562 @@ def initialize_model():
     YOLOモデルを初期化（初回のみ実行）
 
     Returns:
-        YOLO: YOLOv8モデルインスタンス
+        YOLO | ort.InferenceSession: YOLOv8モデルインスタンス、またはONNX Runtimeセッション
     """
 
-    global model
+    global model, predictor, class_names, class_colors, input_size
 
     if model is None:
-        # デフォルトでカスタムモデルを使用
-        model_name = os.environ.get("MODEL_NAME", "/opt/ml/model/best.pt")
+        # 【ONNX Runtime推論 前】Ultralytics + PyTorchで推論
+        if INFERENCE_BACKEND == "ultralytics":
+            # デフォルトでカスタムモデルを使用
+            model_name = os.environ.get("MODEL_NAME", "/opt/ml/model/best.pt")
+
+            print(f"Initializing YOLO model: {model_name}")
+
+            # 【YOLO推論の最適化 前】
+            # model = YOLO(model_name)
+            # print("YOLO model loaded successfully")
+
+            # 【YOLO推論の最適化 後】レイヤーをfuse（10-20%高速化）
+            model = load_fused_yolo(model_name)
+            if USE_IPEX:
+                model.model = optimize_with_ipex(model.model)
+            class_names = model.names
+            print("YOLO model loaded and fused successfully")
+
+            # 【Predictorの再利用 後】YOLO.__call__を経由せず、前処理済みテンソルを直接入力するため
+            predictor = model.predictor or model._smart_load("predictor")(
+                overrides={"mode": "predict", "save": False, "verbose": False},
+                _callbacks=model.callbacks,
+            )
+            predictor.setup_model(model.model, verbose=False)
+            print("YOLO predictor set up successfully")
+
+        # 【TorchScript推論 後】Ultralyticsのラッパーを経由せず、トレースしたグラフを直接実行
+        elif INFERENCE_BACKEND == "torchscript":
+            model_name = os.environ.get("MODEL_NAME", "/opt/ml/model/best.pt")
+
+            print(f"Initializing TorchScript model: {model_name}")
+
+            import torch
+
+            yolo = load_fused_yolo(model_name)
+            class_names = yolo.names
+            detection_model = yolo.model.eval()
+            if USE_IPEX:
+                detection_model = optimize_with_ipex(detection_model)
+            dummy_input = torch.zeros(1, 3, input_size, input_size)
+            with torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_IPEX):
+                # Detectヘッドは初回のforwardでアンカーを生成するため、事前に1回実行してからトレースする
+                # （生成済みのアンカーは定数としてグラフに埋め込まれる）
+                detection_model(dummy_input)
+                model = torch.jit.freeze(
+                    torch.jit.trace(
+                        detection_model,
+                        dummy_input,
+                        strict=False,
+                        check_trace=False,
+                    )
+                )
+            print("TorchScript model traced and frozen successfully")
+
+        # 【ONNX Runtime推論 後】ビルド時にエクスポートしたONNXモデルをORTで推論
+        else:
+            # 【INT8量子化 後】QUANTIZED=1でINT8モデルを使用（デフォルトはFP32、精度を確認してから有効化する）
+            if os.environ.get("QUANTIZED") == "1":
+                model_name = os.environ.get(
+                    "INT8_MODEL_NAME", "/opt/ml/model/best_int8.onnx"
+                )
+            else:
+                model_name = os.environ.get(
+                    "ONNX_MODEL_NAME", "/opt/ml/model/best.onnx"
+                )
+
+            print(f"Initializing ONNX Runtime session: {model_name}")
+
+            sess_options = ort.SessionOptions()
+            sess_options.intra_op_num_threads = os.cpu_count() or 1
+            sess_options.graph_optimization_level = (
+                ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            )
+            sess_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            model = ort.InferenceSession(
+                model_name,
+                sess_options=sess_options,
+                providers=["CPUExecutionProvider"],
+            )
+
+            # クラス名と入力サイズはUltralyticsがエクスポート時に埋め込むメタデータから取得
+            metadata = model.get_modelmeta().custom_metadata_map
+            class_names = ast.literal_eval(metadata["names"])
+            input_size = model.get_inputs()[0].shape[2]
+            print("ONNX Runtime session created successfully")
+
+        # 描画色のテーブル（Ultralyticsと同じパレット、BGR）
+        class_colors = [PALETTE[i % len(PALETTE)] for i in range(max(class_names) + 1)]
 
-        print(f"Initializing YOLO model: {model_name}")
+    return model
 
-        # 【YOLO推論の最適化 前】
-        # model = YOLO(model_name)
-        # print("YOLO model loaded successfully")
 
-        # 【YOLO推論の最適化 後】レイヤーをfuse（10-20%高速化）
-        model = YOLO(model_name)
-        model.fuse()
-        print("YOLO model loaded and fused successfully")
+def load_fused_yolo(model_name: str) -> "YOLO":
+    """
+    YOLOモデルを読み込み、CPU上でConv+BNをfuse
 
-    return model
+    Args:
+        model_name: モデルファイルのパス
+
+    Returns:
+        YOLO: fuse済みのYOLOv8モデルインスタンス
+    """
+    import torch
+    from ultralytics import YOLO
+
+    # 【推論モードのグローバル化 後】リクエスト毎のコンテキストマネージャを使わず、プロセス全体で勾配計算を無効化
+    torch.set_grad_enabled(False)
+
+    yolo = YOLO(model_name)
+
+    # デバイス移動の前にCPU上でfuseし、fuse済みの場合は再実行しない
+    yolo.model.cpu()
+    if not yolo.model.is_fused():
+        yolo.fuse()
+
+    return yolo
+
+
+def log_image_codec_info() -> None:
+    """
+    OpenCV / PillowのJPEGコーデック（libjpeg-turboかどうか）をログに出力
+    """
+    jpeg_info = [
+        line.strip()
+        for line in cv2.getBuildInformation().splitlines()
+        if line.strip().startswith("JPEG:")
+    ]
+    print(f"OpenCV {cv2.__version__} {jpeg_info[0] if jpeg_info else 'JPEG: unknown'}")
+    print(f"Pillow libjpeg_turbo: {features.check_feature('libjpeg_turbo')}")
+
+
+def warmup_model() -> None:
+    """
+    モデルをロードし、ダミー画像で1回推論してウォームアップ
+
+    カーネル選択やメモリ確保など初回推論時の遅延処理を、最初のリクエストより前に済ませる。
+    ダミー画像からは何も検出されないため、描画（初回のcv2.putTextはフォントの初期化で
+    数十msかかる）とJPEGエンコードはダミーのボックスで別途実行する
+    """
+    log_image_codec_info()
+    initialize_model()
+
+    warmup_start = time.time()
+    dummy_image = np.zeros((input_size, input_size, 3), dtype=np.uint8)
+    process_yolo_detection(dummy_image)
+    annotated_image = draw_detections(
+        dummy_image,
+        np.array([[0, 0, 64, 64]], dtype=np.float32),
+        np.array([0.5], dtype=np.float32),
+        np.array([min(class_names)]),
+        [np.ones((64, 64), dtype=bool)],
+    )
+    encode_image(annotated_image)
+    warmup_end = time.time()
+    print(f"Model warmed up in {(warmup_end - warmup_start) * 1000:.2f} ms")
+
+
+def optimize_with_ipex(detection_model: "torch.nn.Module") -> "torch.nn.Module":
+    """
+    Intel Extension for PyTorchでConv+BN+活性化をoneDNNプリミティブに融合し、BF16用に最適化
+
+    Args:
+        detection_model: fuse済みのYOLO検出モデル (torch.nn.Module)
+
+    Returns:
+        torch.nn.Module: 最適化済みモデル（IPEXが利用できない場合はそのまま返す）
+    """
+    import torch
+
+    try:
+        import intel_extension_for_pytorch as ipex
+    except ImportError:
+        print("intel_extension_for_pytorch is not installed, skipping IPEX optimization")
+        return detection_model
+
+    detection_model = ipex.optimize(
+        detection_model.eval(),
+        dtype=torch.bfloat16,
+        level="O1",
+        conv_bn_folding=True,
+        weights_prepack=True,
+    )
+    print("Model optimized with IPEX (bfloat16)")
+    return detection_model
+
+
+def letterbox(
+    image: np.ndarray, new_size: int = 640, out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    アスペクト比を保ったままリサイズし、正方形になるようにパディング
+
+    Args:
+        image: 入力画像 (BGR, numpy.ndarray)
+        new_size: 出力画像の一辺の長さ
+        out: 出力先バッファ [new_size, new_size, 3] (uint8)。指定時は新たにメモリを確保しない
+
+    Returns:
+        Tuple[np.ndarray, float, Tuple[int, int]]: (パディング済み画像, 縮尺, (左パディング, 上パディング))
+    """
+    height, width = image.shape[:2]
+    ratio = min(new_size / height, new_size / width)
+    new_width, new_height = round(width * ratio), round(height * ratio)
+
+    # Ultralyticsのletterboxと同じく、余白を上下左右に均等配分
+    pad_w = (new_size - new_width) / 2
+    pad_h = (new_size - new_height) / 2
+    top, bottom = round(pad_h - 0.1), round(pad_h + 0.1)
+    left, right = round(pad_w - 0.1), round(pad_w + 0.1)
+
+    if out is None:
+        if (width, height) != (new_width, new_height):
+            image = cv2.resize(
+                image, (new_width, new_height), interpolation=cv2.INTER_LINEAR
+            )
+        padded = cv2.copyMakeBorder(
+            image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
+        return padded, ratio, (left, top)
+
+    # 出力先バッファの中央領域に直接リサイズし、余白部分のみ塗りつぶす
+    content = out[top : top + new_height, left : left + new_width]
+    if (width, height) != (new_width, new_height):
+        cv2.resize(
+            image, (new_width, new_height), dst=content, interpolation=cv2.INTER_LINEAR
+        )
+    else:
+        content[...] = image
+    out[:top] = 114
+    out[top + new_height :] = 114
+    out[top : top + new_height, :left] = 114
+    out[top : top + new_height, left + new_width :] = 114
+
+    return out, ratio, (left, top)
+
+
+def preprocess_image(image: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    推論用の入力テンソルを作成
+
+    返す入力テンソルは再利用バッファのため、次の呼び出しで上書きされる
+
+    Args:
+        image: 入力画像 (BGR, numpy.ndarray)
+
+    Returns:
+        Tuple[np.ndarray, float, Tuple[int, int]]: (入力テンソル[1, 3, H, W], 縮尺, (左パディング, 上パディング))
+    """
+    global letterbox_buffer, input_buffer
+
+    if letterbox_buffer is None or letterbox_buffer.shape[0] != input_size:
+        letterbox_buffer = np.empty((input_size, input_size, 3), dtype=np.uint8)
+        input_buffer = np.empty((1, 3, input_size, input_size), dtype=np.float32)
+
+    padded, ratio, pad = letterbox(image, input_size, out=letterbox_buffer)
+
+    # 【前処理の融合 前】BGR→RGB、HWC→CHW、float変換、0-1正規化をそれぞれ別のパスで処理
+    # blob = padded[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    # return blob[None], ratio, pad
+
+    # 【入力バッファの再利用 後】BGR→RGB / HWC→CHW / 0-1正規化 を1パスで再利用バッファに書き込む
+    np.multiply(
+        padded[:, :, ::-1].transpose(2, 0, 1),
+        1 / 255.0,
+        out=input_buffer[0],
+        dtype=np.float32,
+        casting="unsafe",
+    )
+
+    return input_buffer, ratio, pad
+
+
+def postprocess_output(
+    output: np.ndarray,
+    image_shape: Tuple[int, ...],
+    ratio: float,
+    pad: Tuple[int, int],
+    conf_threshold: float,
+    iou_threshold: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    モデル出力からNMSを行い、元画像座標の検出結果に変換
+
+    Args:
+        output: モデル出力 [1, 4 + クラス数 (+ マスク係数32), 候補数] (cx, cy, w, h, 各クラスのスコア, ...)
+        image_shape: 元画像のshape
+        ratio: letterboxの縮尺
+        pad: letterboxの(左パディング, 上パディング)
+        conf_threshold: 信頼度の閾値
+        iou_threshold: IoUの閾値
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: (バウンディングボックス[N, 4] (x1, y1, x2, y2), 信頼度[N], クラスID[N], マスク係数[N, 32]（検出モデルは[N, 0]）)
+    """
+    predictions = output[0].T
+
+    # 信頼度でフィルタリング（セグメンテーションモデルはクラススコアの後ろにマスク係数が続く）
+    class_scores = predictions[:, 4 : 4 + len(class_names)]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    keep = scores > conf_threshold
+    boxes, scores, class_ids = predictions[keep, :4], scores[keep], class_ids[keep]
+
+    # クラスごとのNMS（cv2.dnn.NMSBoxesBatchedは左上座標 + 幅・高さを受け取る）
+    boxes_xywh = boxes.copy()
+    boxes_xywh[:, :2] -= boxes[:, 2:] / 2
+    indices = cv2.dnn.NMSBoxesBatched(
+        boxes_xywh.tolist(),
+        scores.tolist(),
+        class_ids.tolist(),
+        conf_threshold,
+        iou_threshold,
+    )
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+    # letterbox座標 -> 元画像座標に変換
+    pad_left, pad_top = pad
+    xyxy = np.empty((len(indices), 4), dtype=np.float32)
+    xyxy[:, :2] = boxes_xywh[indices, :2]
+    xyxy[:, 2:] = boxes_xywh[indices, :2] + boxes_xywh[indices, 2:]
+    xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_left) / ratio
+    xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_top) / ratio
+    height, width = image_shape[:2]
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+
+    mask_coefs = predictions[keep, 4 + len(class_names) :][indices]
+
+    return xyxy, scores[indices], class_ids[indices], mask_coefs
+
+
+def scale_masks_to_boxes(
+    mask_maps: np.ndarray,
+    xyxy: np.ndarray,
+    ratio: float,
+    pad: Tuple[int, int],
+    threshold: float,
+) -> List[np.ndarray]:
+    """
+    letterbox座標系のマスクを、元画像のバウンディングボックス領域に切り出して二値化
+
+    ボックス外の画素は描画しないため、元画像全体ではなくボックス領域のみを補間する
+
+    Args:
+        mask_maps: letterbox座標系のマスク [N, mh, mw]（解像度は入力サイズの整数分の1でもよい）
+        xyxy: 元画像座標のバウンディングボックス [N, 4]
+        ratio: letterboxの縮尺
+        pad: letterboxの(左パディング, 上パディング)
+        threshold: 二値化の閾値
+
+    Returns:
+        List[np.ndarray]: ボックス毎のマスク（ボックス領域 [y1:y2, x1:x2] と同じshapeのbool配列）
+    """
+    # 元画像座標 -> マスク座標の変換（letterboxの縮尺・パディングとマスクの解像度）
+    mask_scale = mask_maps.shape[2] / input_size
+    scale = ratio * mask_scale
+    pad_left, pad_top = pad
+
+    masks = []
+    for mask_map, (x1, y1, x2, y2) in zip(mask_maps, xyxy.astype(np.int32).tolist()):
+        width, height = max(x2 - x1, 0), max(y2 - y1, 0)
+        if width == 0 or height == 0:
+            masks.append(np.zeros((height, width), dtype=bool))
+            continue
+        # ボックス内の各画素の中心をマスク座標に対応付けてバイリニア補間
+        matrix = np.array(
+            [
+                [scale, 0, (x1 + 0.5) * scale + pad_left * mask_scale - 0.5],
+                [0, scale, (y1 + 0.5) * scale + pad_top * mask_scale - 0.5],
+            ]
+        )
+        mask = cv2.warpAffine(
+            mask_map,
+            matrix,
+            (width, height),
+            flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_REPLICATE,
+        )
+        masks.append(mask > threshold)
+
+    return masks
+
+
+def run_inference(
+    yolo_model,
+    image: np.ndarray,
+    conf_threshold: float,
+    iou_threshold: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[List[np.ndarray]]]:
+    """
+    ONNX Runtime / TorchScriptで前処理・推論・NMS・マスク作成を実行
+
+    Args:
+        yolo_model: ONNX Runtimeセッション、またはTorchScriptモデル
+        image: 入力画像 (BGR, numpy.ndarray)
+        conf_threshold: 信頼度の閾値
+        iou_threshold: IoUの閾値
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[List[np.ndarray]]]: (バウンディングボックス[N, 4] (x1, y1, x2, y2), 信頼度[N], クラスID[N], ボックス毎のマスク（検出モデルはNone）)
+    """
+    blob, ratio, pad = preprocess_image(image)
+    protos = None
+
+    if INFERENCE_BACKEND == "torchscript":
+        import torch
+
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_IPEX):
+            output = yolo_model(torch.from_numpy(blob))
+        # Detect / Segmentヘッドは (予測, 特徴マップなど) のタプルを返す
+        # Segmentヘッドは (予測, (特徴マップ, マスク係数, プロトタイプ)) の順
+        if isinstance(output, (list, tuple)):
+            if isinstance(output[1], (list, tuple)) and len(output[1]) == 3:
+                protos = output[1][2].float().numpy()
+            output = output[0]
+        # BF16はNumPyで扱えないためFP32に戻す
+        output = output.float().numpy()
+    else:
+        # セグメンテーションモデルは output1 にプロトタイプマスク [1, 32, 160, 160] を出力する
+        outputs = yolo_model.run(None, {"images": blob})
+        output = outputs[0]
+        if len(outputs) > 1:
+            protos = outputs[1]
+
+    xyxy, confs, class_ids, mask_coefs = postprocess_output(
+        output, image.shape, ratio, pad, conf_threshold, iou_threshold
+    )
+
+    masks = None
+    if protos is not None and mask_coefs.shape[1] > 0:
+        # マスク係数とプロトタイプの線形結合（ロジットのまま0で二値化、sigmoid後の0.5と等価）
+        num_protos, proto_h, proto_w = protos.shape[1:]
+        mask_maps = (mask_coefs @ protos[0].reshape(num_protos, -1)).reshape(
+            -1, proto_h, proto_w
+        )
+        masks = scale_masks_to_boxes(mask_maps, xyxy, ratio, pad, threshold=0.0)
+
+    return xyxy, confs, class_ids, masks
+
+
+def draw_detections(
+    image: np.ndarray,
+    xyxy: np.ndarray,
+    confs: np.ndarray,
+    class_ids: np.ndarray,
+    masks: Optional[List[np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    検出結果を画像に描画（OpenCVの描画関数でマスク・バウンディングボックス・ラベルを描画）
+
+    Args:
+        image: 入力画像 (BGR, numpy.ndarray)
+        xyxy: バウンディングボックス [N, 4]
+        confs: 信頼度 [N]
+        class_ids: クラスID [N]
+        masks: ボックス毎のセグメンテーションマスク（ボックス領域と同じshapeのbool配列、Noneの場合は描画しない）
+
+    Returns:
+        np.ndarray: 検出結果画像 (BGR, numpy.ndarray)
+    """
+    annotated_image = image.copy()
+
+    # 線の太さはUltralyticsのAnnotatorと同じく画像サイズから決める
+    line_width = max(round(sum(image.shape) / 2 * 0.003), 2)
+    font_scale = line_width / 3
+    font_thickness = max(line_width - 1, 1)
+
+    # マスクはUltralyticsのResults.plot()と同じく、ボックスより先にクラス色で半透明(50%)に塗る
+    if masks is not None:
+        for (x1, y1, x2, y2), mask, class_id in zip(
+            xyxy.astype(np.int32).tolist(), masks, class_ids.tolist()
+        ):
+            region = annotated_image[y1:y2, x1:x2]
+            region[mask] = (region[mask] + np.array(class_colors[class_id])) // 2
+
+    for (x1, y1, x2, y2), conf, class_id in zip(
+        xyxy.astype(np.int32).tolist(), confs.tolist(), class_ids.tolist()
+    ):
+        color = class_colors[class_id]
+        cv2.rectangle(
+            annotated_image, (x1, y1), (x2, y2), color, line_width, cv2.LINE_AA
+        )
+
+        # ラベル（背景を塗りつぶして白文字で描画）
+        label = f"{class_names[class_id]} {conf:.2f}"
+        (text_w, text_h), _ = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness
+        )
+        outside = y1 - text_h - 3 >= 0  # ラベルがボックスの上に収まるか
+        label_y = y1 - text_h - 3 if outside else y1 + text_h + 3
+        cv2.rectangle(
+            annotated_image, (x1, y1), (x1 + text_w, label_y), color, -1, cv2.LINE_AA
+        )
+        cv2.putText(
+            annotated_image,
+            label,
+            (x1, y1 - 2 if outside else y1 + text_h + 2),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale,
+            (255, 255, 255),
+            font_thickness,
+            cv2.LINE_AA,
+        )
+
+    return annotated_image
+
+
+def get_s3_client():
+    """
+    S3クライアントを取得（初回のみ作成）
+
+    Returns:
+        S3.Client: boto3のS3クライアント
+    """
+    global s3_client
+
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    return s3_client
+
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """
+    画像ファイルのバイト列を画像(numpy配列)にデコード
+
+    Args:
+        image_bytes: JPEG/PNGなどの画像ファイルのバイト列
+
+    Returns:
+        np.ndarray: OpenCV形式の画像 (BGR, numpy.ndarray)
+    """
+    # 【画像デコードの高速化 前】PILで画像を開き、numpy配列にコピー
+    # image_pil = Image.open(BytesIO(image_bytes))
+    # if image_pil.mode != "RGB":  # グレースケール、RGBA、パレットなど
+    #     image_pil = image_pil.convert("RGB")
+    # return np.asarray(image_pil)
+
+    # 【画像デコードの高速化 後】cv2.imdecode（libjpeg-turbo）で直接BGRのnumpy配列にデコード
+    # IMREAD_COLORはグレースケールを3チャンネルに変換し、アルファチャンネルは破棄する
+    # PILと同じくEXIFのOrientationは適用しない（bboxの座標系を変えないため）
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image_bgr = cv2.imdecode(buffer, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+
+    # OpenCVが未対応の形式（GIFなど）はPILでデコード
+    if image_bgr is None:
+        image_pil = Image.open(BytesIO(image_bytes)).convert("RGB")
+        image_bgr = cv2.cvtColor(np.asarray(image_pil), cv2.COLOR_RGB2BGR)
+
+    return image_bgr
 
 
 def decode_base64_image(base64_string: str):
@@ -63,21 +638,39 @@ def decode_base64_image(base64_string: str):
         np.ndarray: OpenCV形式の画像 (BGR, numpy.ndarray)
     """
     # Base64デコード
-    image_bytes = base64.b64decode(base64_string)
+    image_bytes = pybase64.b64decode(base64_string, validate=False)
 
-    # PILで画像を開く
-    image_pil = Image.open(BytesIO(image_bytes))
+    return decode_image(image_bytes)
 
-    # RGB -> BGR変換（OpenCV形式）
-    image_rgb = np.array(image_pil)
-    if len(image_rgb.shape) == 2:  # グレースケール
-        image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_GRAY2BGR)
-    elif image_rgb.shape[2] == 4:  # RGBA
-        image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGBA2BGR)
-    else:  # RGB
-        image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
 
-    return image_bgr
+def shrink_image(image: np.ndarray, max_side: int) -> np.ndarray:
+    """
+    長辺がmax_sideを超える場合に、アスペクト比を保って縮小
+
+    JPEGエンコードの処理時間とBase64のサイズは画素数に比例するため、
+    検出結果の確認に十分な解像度まで縮小してからエンコードする
+    （例: 4K画像を長辺1280に縮小すると画素数は約1/9）。
+    INTER_AREAは縮小率が整数でない場合に非常に遅く（3000x5000→長辺1280で約65ms）、
+    エンコードの短縮分を上回るため、INTER_LINEAR（同約3ms）で縮小する。
+    検出結果のbboxは元画像の座標のままのため、縮小後の画像とは座標系が異なる。
+
+    Args:
+        image: 入力画像 (BGR, numpy.ndarray)
+        max_side: 長辺の最大値（0以下の場合は縮小しない）
+
+    Returns:
+        np.ndarray: 縮小した画像 (BGR, numpy.ndarray)
+    """
+    height, width = image.shape[:2]
+    if max_side <= 0 or max(height, width) <= max_side:
+        return image
+
+    scale = max_side / max(height, width)
+    return cv2.resize(
+        image,
+        (round(width * scale), round(height * scale)),
+        interpolation=cv2.INTER_LINEAR,
+    )
 
 
 # 【画像エンコード形式 前】
@@ -111,8 +704,96 @@ def decode_base64_image(base64_string: str):
 
 
 # 【画像エンコード形式 後】JPEG形式で圧縮率を上げエンコード時間を98%削減
+# 【画像エンコードの高速化 前】PILでエンコード（BGR -> RGB変換 + PIL Image経由）
+# def encode_image_to_base64(
+#     image: np.ndarray, format: str = "JPEG", quality: int = 85
+# ) -> str:
+#     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+#     image_pil = Image.fromarray(image_rgb)
+#     buffer = BytesIO()
+#     if format == "JPEG":
+#         image_pil.save(buffer, format=format, quality=quality)
+#     else:
+#         image_pil.save(buffer, format=format)
+#     buffer.seek(0)
+#     image_base64 = base64.b64encode(buffer.read()).decode("utf-8")
+#     return image_base64
+
+
+# 【画像エンコードの高速化 後】cv2.imencodeでBGR配列を直接エンコード（色変換のコピーを削減）
+# JPEGのクロマサブサンプリング指定 → OpenCVのサンプリング係数
+JPEG_SAMPLING_FACTORS = {
+    "4:2:0": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+    "4:2:2": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+    "4:4:4": cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+}
+
+
+def encode_image(
+    image: np.ndarray,
+    format: str = "JPEG",
+    quality: int = 75,
+    subsampling: str = "4:2:0",
+) -> bytes:
+    """
+    画像(numpy配列)を画像ファイルのバイト列にエンコード
+
+    JPEGの品質とサブサンプリングはエンコード時間とサイズのトレードオフ:
+
+        設定                  エンコード時間  サイズ  画質
+        quality=95, 4:4:4     遅い            大      高
+        quality=85, 4:2:0     中              中      中〜高
+        quality=75, 4:2:0     速い            小      中（検出結果の確認には十分）
+
+    Args:
+        image: OpenCV形式の画像 (BGR, numpy.ndarray)
+        format: 出力フォーマット ("PNG" or "JPEG")
+        quality: JPEG品質 (1-100、デフォルト75)
+        subsampling: JPEGのクロマサブサンプリング ("4:2:0", "4:2:2", "4:4:4")
+
+    Returns:
+        bytes: エンコードされた画像ファイルのバイト列
+    """
+    # cv2.imencodeは連続したメモリ配置の配列を前提とする
+    image = np.ascontiguousarray(image)
+
+    # バイト列にエンコード（libjpeg-turbo / libpng）
+    if format == "JPEG":
+        if subsampling not in JPEG_SAMPLING_FACTORS:
+            raise ValueError(f"未対応のサブサンプリング指定です: {subsampling}")
+        ok, buffer = cv2.imencode(
+            ".jpg",
+            image,
+            [
+                int(cv2.IMWRITE_JPEG_QUALITY),
+                quality,
+                int(cv2.IMWRITE_JPEG_LUMA_QUALITY),
+                quality,
+                int(cv2.IMWRITE_JPEG_CHROMA_QUALITY),
+                quality,
+                int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR),
+                int(JPEG_SAMPLING_FACTORS[subsampling]),
+                int(cv2.IMWRITE_JPEG_OPTIMIZE),
+                0,
+                int(cv2.IMWRITE_JPEG_PROGRESSIVE),
+                0,
+            ],
+        )
+    else:
+        ok, buffer = cv2.imencode(
+            ".png", image, [int(cv2.IMWRITE_PNG_COMPRESSION), 1]
+        )
+    if not ok:
+        raise ValueError(f"画像のエンコードに失敗しました: {format}")
+
+    return buffer.tobytes()
+
+
 def encode_image_to_base64(
-    image: np.ndarray, format: str = "JPEG", quality: int = 85
+    image: np.ndarray,
+    format: str = "JPEG",
+    quality: int = 75,
+    subsampling: str = "4:2:0",
 ) -> str:
     """
     画像(numpy配列)をBase64文字列にエンコード
@@ -120,27 +801,18 @@ def encode_image_to_base64(
     Args:
         image: OpenCV形式の画像 (BGR, numpy.ndarray)
         format: 出力フォーマット ("PNG" or "JPEG")
-        quality: JPEG品質 (1-100、デフォルト85)
+        quality: JPEG品質 (1-100、デフォルト75)
+        subsampling: JPEGのクロマサブサンプリング ("4:2:0", "4:2:2", "4:4:4")
 
     Returns:
         str: Base64エンコードされた画像文字列
     """
-    # BGR -> RGB変換
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-    # PIL Imageに変換
-    image_pil = Image.fromarray(image_rgb)
-
-    # バイトストリームに書き込み
-    buffer = BytesIO()
-    if format == "JPEG":
-        image_pil.save(buffer, format=format, quality=quality)
-    else:
-        image_pil.save(buffer, format=format)
-    buffer.seek(0)
+    image_bytes = encode_image(
+        image, format=format, quality=quality, subsampling=subsampling
+    )
 
     # Base64エンコード
-    image_base64 = base64.b64encode(buffer.read()).decode("utf-8")
+    image_base64 = pybase64.b64encode(image_bytes).decode("ascii")
 
     return image_base64
 
@@ -165,38 +837,104 @@ def process_yolo_detection(
     # モデルを取得
     yolo_model = initialize_model()
 
-    # YOLO推論を実行（時間計測）
-    # 【YOLO推論の最適化 前】
-    # inference_start = time.time()
-    # results = yolo_model(image, conf=conf_threshold, iou=iou_threshold, verbose=False)
-    # inference_end = time.time()
-    # timing["inference_ms"] = (inference_end - inference_start) * 1000
-    # 【YOLO推論の最適化 後】推論モードで勾配計算を無効化して高速化
-    inference_start = time.time()
-    with torch.inference_mode():
-        results = yolo_model(
-            image, conf=conf_threshold, iou=iou_threshold, verbose=False
+    # 【ONNX Runtime推論 後】ONNX Runtime / TorchScriptで推論し、検出結果を配列で受け取る
+    if INFERENCE_BACKEND in ("onnx", "torchscript"):
+        inference_start = time.time()
+        xyxy, confs, class_ids, masks = run_inference(
+            yolo_model, image, conf_threshold, iou_threshold
         )
+    else:
+        # YOLO推論を実行（時間計測）
+        # 【YOLO推論の最適化 前】
+        # inference_start = time.time()
+        # results = yolo_model(image, conf=conf_threshold, iou=iou_threshold, verbose=False)
+        # inference_end = time.time()
+        # timing["inference_ms"] = (inference_end - inference_start) * 1000
+        # 【YOLO推論の最適化 後】推論モードで勾配計算を無効化して高速化
+        # inference_start = time.time()
+        # with torch.inference_mode():
+        #     results = yolo_model(
+        #         image, conf=conf_threshold, iou=iou_threshold, verbose=False
+        #     )
+        # inference_end = time.time()
+        # timing["inference_ms"] = (inference_end - inference_start) * 1000
+        # 【推論モードのグローバル化 後】勾配計算はモジュール読み込み時に無効化済み
+        # inference_start = time.time()
+        # with torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_IPEX):
+        #     results = yolo_model(
+        #         image, conf=conf_threshold, iou=iou_threshold, verbose=False
+        #     )
+        # inference_end = time.time()
+        # 【Predictorの再利用 後】前処理済みテンソルをモデルに直接入力し、NMSのみPredictorを使用
+        import torch
+
+        inference_start = time.time()
+        in_tensor, ratio, pad = preprocess_image(image)
+        in_tensor = torch.from_numpy(in_tensor)
+        predictor.args.conf = conf_threshold
+        predictor.args.iou = iou_threshold
+        # postprocessは (パス, 元画像, ログ文字列) のバッチ情報を参照する
+        predictor.batch = (["image"], [image], [""])
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_IPEX):
+            preds = predictor.model(in_tensor)
+        results = predictor.postprocess(preds, in_tensor, [image])
+
+        # 【検出リスト作成のベクトル化 前】ボックス毎にTensor -> Pythonの変換が発生
+        # detections = []
+        # for box in results[0].boxes:
+        #     detection = {
+        #         "class_id": int(box.cls[0]),
+        #         "class_name": yolo_model.names[int(box.cls[0])],
+        #         "confidence": float(box.conf[0]),
+        #         "bbox": box.xyxy[0].tolist(),  # [x1, y1, x2, y2]
+        #     }
+        #     detections.append(detection)
+        # 【検出リスト作成のベクトル化 後】項目毎に1回だけnumpy配列に変換
+        boxes = results[0].boxes
+        class_ids = boxes.cls.to(torch.int64).cpu().numpy()
+        confs = boxes.conf.float().cpu().numpy()
+        xyxy = boxes.xyxy.float().cpu().numpy()
+
+        # マスクはletterbox座標系の二値マスク [N, 640, 640] のため、元画像のボックス領域に変換
+        masks = None
+        if results[0].masks is not None:
+            masks = scale_masks_to_boxes(
+                results[0].masks.data.float().cpu().numpy(),
+                xyxy,
+                ratio,
+                pad,
+                threshold=0.5,
+            )
+
     inference_end = time.time()
     timing["inference_ms"] = (inference_end - inference_start) * 1000
 
     # 結果を描画（時間計測）
+    # 【結果描画の高速化 前】
+    # plot_start = time.time()
+    # annotated_image = results[0].plot()
+    # plot_end = time.time()
+    # timing["plot_ms"] = (plot_end - plot_start) * 1000
+    # 【結果描画の高速化 後】Results.plot()を使わず、OpenCVで直接描画
     plot_start = time.time()
-    annotated_image = results[0].plot()
+    annotated_image = draw_detections(image, xyxy, confs, class_ids, masks)
     plot_end = time.time()
     timing["plot_ms"] = (plot_end - plot_start) * 1000
 
     # 検出されたオブジェクトのリストを作成（時間計測）
     detection_list_start = time.time()
-    detections = []
-    for box in results[0].boxes:
-        detection = {
-            "class_id": int(box.cls[0]),
-            "class_name": yolo_model.names[int(box.cls[0])],
-            "confidence": float(box.conf[0]),
-            "bbox": box.xyxy[0].tolist(),  # [x1, y1, x2, y2]
+    # confidence / bbox はnumpy型のまま保持し、orjsonで直接シリアライズする
+    # クラスIDはtolist()で一括してintに変換し、クラス名の参照と共用する
+    names = class_names
+    detections = [
+        {
+            "class_id": class_id,
+            "class_name": names[class_id],
+            "confidence": conf,
+            "bbox": box,  # [x1, y1, x2, y2]
         }
-        detections.append(detection)
+        for class_id, conf, box in zip(class_ids.tolist(), confs, xyxy)
+    ]
     detection_list_end = time.time()
     timing["detection_list_ms"] = (detection_list_end - detection_list_start) * 1000
 
@@ -208,11 +946,16 @@ def lambda_handler(event, context):
     Lambda関数ハンドラー - シンプルYOLOサンプル
 
     Args:
-        event: Lambdaイベント
+        event: Lambdaイベント（S3経由、またはBase64のいずれか）
             {
-                "image": "base64エンコードされた画像",
+                "s3_bucket": "入力画像のS3バケット",
+                "s3_key": "入力画像のS3キー",
+                "output_bucket": "検出結果画像の出力先S3バケット" (オプション),
+                "output_key": "検出結果画像の出力先S3キー" (オプション),
+                "image": "base64エンコードされた画像" (S3を使わない場合),
                 "conf_threshold": 0.25 (オプション),
-                "iou_threshold": 0.45 (オプション)
+                "iou_threshold": 0.45 (オプション),
+                "output_max_side": 1280 (オプション、検出結果画像の長辺の最大値。0で縮小しない)
             }
         context: Lambda実行コンテキスト
 
@@ -221,7 +964,8 @@ def lambda_handler(event, context):
             {
                 "statusCode": 200,
                 "body": {
-                    "annotatedImage": "base64エンコードされた検出結果画像",
+                    "annotatedImageS3": {"bucket": "...", "key": "..."} (S3経由の場合),
+                    "annotatedImage": "base64エンコードされた検出結果画像" (Base64の場合),
                     "detections": [
                         {
                             "class_id": 0,
@@ -246,14 +990,18 @@ def lambda_handler(event, context):
         timing_breakdown = {}
 
         # 入力パラメータを取得
-        if "image" not in event:
+        # 【S3経由の入出力 後】s3_bucket/s3_keyがあればS3経由、なければ従来のBase64で入出力
+        use_s3 = "s3_bucket" in event and "s3_key" in event
+        if not use_s3 and "image" not in event:
             return {
                 "statusCode": 400,
-                "body": json.dumps({"error": "入力パラメータ 'image' が必要です"}),
+                "body": orjson.dumps(
+                    {
+                        "error": "入力パラメータ 's3_bucket' と 's3_key'、または 'image' が必要です"
+                    }
+                ).decode(),
             }
 
-        image_base64 = event["image"]
-
         # 閾値を取得（優先順位: event > 環境変数 > デフォルト値）
         conf_threshold = float(
             event.get("conf_threshold", os.environ.get("CONF_THRESHOLD", "0.25"))
@@ -262,13 +1010,38 @@ def lambda_handler(event, context):
             event.get("iou_threshold", os.environ.get("IOU_THRESHOLD", "0.45"))
         )
 
+        # JPEGエンコード設定を取得（優先順位: 環境変数 > デフォルト値）
+        jpeg_quality = int(os.environ.get("JPEG_QUALITY", "75"))
+        jpeg_subsampling = os.environ.get("JPEG_SUBSAMPLING", "4:2:0")
+
+        # 検出結果画像の長辺の最大値（0で縮小しない）
+        output_max_side = int(
+            event.get("output_max_side", os.environ.get("OUTPUT_MAX_SIDE", "1280"))
+        )
+
         print(f"Confidence threshold: {conf_threshold}")
         print(f"IoU threshold: {iou_threshold}")
 
-        # Base64デコード（時間計測）
-        decode_start = time.time()
-        image = decode_base64_image(image_base64)
-        decode_end = time.time()
+        if use_s3:
+            # S3から画像をダウンロード（時間計測）
+            download_start = time.time()
+            s3_object = get_s3_client().get_object(
+                Bucket=event["s3_bucket"], Key=event["s3_key"]
+            )
+            image_bytes = s3_object["Body"].read()
+            download_end = time.time()
+            timing_breakdown["s3_download_ms"] = (download_end - download_start) * 1000
+            print(f"S3 download time: {timing_breakdown['s3_download_ms']:.2f} ms")
+
+            # 画像デコード（時間計測）
+            decode_start = time.time()
+            image = decode_image(image_bytes)
+            decode_end = time.time()
+        else:
+            # Base64デコード（時間計測）
+            decode_start = time.time()
+            image = decode_base64_image(event["image"])
+            decode_end = time.time()
         timing_breakdown["decode_ms"] = (decode_end - decode_start) * 1000
         print(f"Image shape: {image.shape}")
         print(f"Decode time: {timing_breakdown['decode_ms']:.2f} ms")
@@ -288,13 +1061,62 @@ def lambda_handler(event, context):
         print(f"  - Plot: {yolo_timing['plot_ms']:.2f} ms")
         print(f"  - Detection list: {yolo_timing['detection_list_ms']:.2f} ms")
 
-        # 検出結果画像をBase64エンコード（時間計測）
-        print("Encoding annotated image to base64...")
-        encode_start = time.time()
-        annotated_image_base64 = encode_image_to_base64(annotated_image)
-        encode_end = time.time()
-        timing_breakdown["encode_ms"] = (encode_end - encode_start) * 1000
-        print(f"Encode time: {timing_breakdown['encode_ms']:.2f} ms")
+        # 検出結果画像を縮小（時間計測）
+        resize_start = time.time()
+        annotated_image = shrink_image(annotated_image, output_max_side)
+        resize_end = time.time()
+        timing_breakdown["resize_ms"] = (resize_end - resize_start) * 1000
+        print(f"Resize time: {timing_breakdown['resize_ms']:.2f} ms")
+
+        if use_s3:
+            # 検出結果画像をJPEGエンコード（時間計測）
+            print("Encoding annotated image to JPEG...")
+            encode_start = time.time()
+            annotated_image_bytes = encode_image(
+                annotated_image,
+                quality=jpeg_quality,
+                subsampling=jpeg_subsampling,
+            )
+            encode_end = time.time()
+            timing_breakdown["encode_ms"] = (encode_end - encode_start) * 1000
+            print(f"Encode time: {timing_breakdown['encode_ms']:.2f} ms")
+
+            # 検出結果画像をS3にアップロード（時間計測）
+            # 出力先の優先順位: event > 環境変数 > 入力と同じバケットの annotated/ 配下
+            # 出力は常にJPEGのため、デフォルトのキーは拡張子を .jpg に置き換える
+            output_bucket = event.get(
+                "output_bucket", os.environ.get("OUTPUT_BUCKET", event["s3_bucket"])
+            )
+            output_key = event.get(
+                "output_key",
+                f"annotated/{os.path.splitext(event['s3_key'])[0]}.jpg",
+            )
+            upload_start = time.time()
+            get_s3_client().put_object(
+                Bucket=output_bucket,
+                Key=output_key,
+                Body=annotated_image_bytes,
+                ContentType="image/jpeg",
+            )
+            upload_end = time.time()
+            timing_breakdown["s3_upload_ms"] = (upload_end - upload_start) * 1000
+            print(f"S3 upload time: {timing_breakdown['s3_upload_ms']:.2f} ms")
+            annotated_image_output = {
+                "annotatedImageS3": {"bucket": output_bucket, "key": output_key}
+            }
+        else:
+            # 検出結果画像をBase64エンコード（時間計測）
+            print("Encoding annotated image to base64...")
+            encode_start = time.time()
+            annotated_image_base64 = encode_image_to_base64(
+                annotated_image,
+                quality=jpeg_quality,
+                subsampling=jpeg_subsampling,
+            )
+            encode_end = time.time()
+            timing_breakdown["encode_ms"] = (encode_end - encode_start) * 1000
+            print(f"Encode time: {timing_breakdown['encode_ms']:.2f} ms")
+            annotated_image_output = {"annotatedImage": annotated_image_base64}
 
         # サマリー情報を作成（時間計測）
         summary_start = time.time()
@@ -307,17 +1129,32 @@ def lambda_handler(event, context):
         timing_breakdown["summary_ms"] = (summary_end - summary_start) * 1000
 
         # レスポンスを返す
+        # 【JSONシリアライズの高速化 前】
+        # response = {
+        #     "statusCode": 200,
+        #     "body": json.dumps(
+        #         {
+        #             **annotated_image_output,
+        #             "detections": detections,
+        #             "summary": summary,
+        #             "inference_time_ms": yolo_timing["inference_ms"],
+        #             "timing_breakdown": timing_breakdown,
+        #         }
+        #     ),
+        # }
+        # 【JSONシリアライズの高速化 後】orjsonでシリアライズ（Lambdaのbodyはstrのためdecode）
         response = {
             "statusCode": 200,
-            "body": json.dumps(
+            "body": orjson.dumps(
                 {
-                    "annotatedImage": annotated_image_base64,
+                    **annotated_image_output,
                     "detections": detections,
                     "summary": summary,
                     "inference_time_ms": yolo_timing["inference_ms"],
                     "timing_breakdown": timing_breakdown,
-                }
-            ),
+                },
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            ).decode(),
         }
 
         print("Lambda function completed successfully")
@@ -332,5 +1169,21 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": str(e), "type": type(e).__name__}),
+            "body": orjson.dumps({"error": str(e), "type": type(e).__name__}).decode(),
         }
+
+
+# 【モデルの事前ロード 前】初回リクエスト時にinitialize_model()でロード
+# 【モデルの事前ロード 後】Lambda環境ではコンテナ初期化時（INITフェーズ）にロードとウォームアップを実行
+if os.environ.get("AWS_EXECUTION_ENV"):
+    try:
+        warmup_model()
+    except Exception as e:
+        # ウォームアップの失敗でINITフェーズを失敗させず、初回リクエスト時の遅延初期化に戻す
+        print(f"Model warmup failed, falling back to lazy initialization: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+
+        model = None
+        predictor = None
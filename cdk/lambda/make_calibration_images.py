@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+INT8量子化のキャリブレーション画像を元画像から水増し生成するスクリプト
+
+推論対象の画像が少ない場合に、切り抜き・拡大縮小・反転・明るさ/色の変化を加えた画像を
+生成する（Dockerビルド時に実行。推論対象の実画像が用意できる場合はそちらを優先すること）
+
+使い方:
+    python make_calibration_images.py --source /tmp/calibration/* --output /tmp/calibration --count 99
+"""
+import argparse
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+
+def augment_image(image: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    画像にランダムな切り抜き・拡大縮小・反転・明るさ/色の変化を加える
+
+    Args:
+        image: 元画像 (BGR, numpy.ndarray)
+        rng: 乱数生成器
+
+    Returns:
+        np.ndarray: 変換後の画像 (BGR, numpy.ndarray)
+    """
+    height, width = image.shape[:2]
+
+    # 元画像の50-100%の領域を、縦横比を変えて切り抜く
+    crop_h = int(height * rng.uniform(0.5, 1.0))
+    crop_w = int(width * rng.uniform(0.5, 1.0))
+    top = rng.integers(0, height - crop_h + 1)
+    left = rng.integers(0, width - crop_w + 1)
+    image = image[top : top + crop_h, left : left + crop_w]
+
+    # letterboxの縮尺・パディングが変わるよう、長辺320-960に拡大縮小
+    scale = rng.uniform(320, 960) / max(crop_h, crop_w)
+    image = cv2.resize(
+        image,
+        (max(round(crop_w * scale), 1), max(round(crop_h * scale), 1)),
+        interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR,
+    )
+
+    if rng.random() < 0.5:
+        image = cv2.flip(image, 1)
+
+    # 色相・彩度・明度を変化させる
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV).astype(np.float32)
+    hsv[..., 0] = (hsv[..., 0] + rng.uniform(-8, 8)) % 180
+    hsv[..., 1] *= rng.uniform(0.6, 1.4)
+    hsv[..., 2] = hsv[..., 2] * rng.uniform(0.6, 1.3) + rng.uniform(-30, 30)
+    image = cv2.cvtColor(hsv.clip(0, 255).astype(np.uint8), cv2.COLOR_HSV2BGR)
+
+    if rng.random() < 0.3:
+        image = cv2.GaussianBlur(image, (5, 5), 0)
+
+    return image
+
+
+def make_calibration_images(
+    source_paths: List[str], output_dir: str, count: int, seed: int = 0
+) -> None:
+    """
+    元画像から水増ししたキャリブレーション画像を生成
+
+    Args:
+        source_paths: 元画像のパスのリスト
+        output_dir: 出力先ディレクトリ
+        count: 生成する画像数
+        seed: 乱数シード（同じシードなら同じ画像を生成する）
+    """
+    rng = np.random.default_rng(seed)
+    # 画像として読み込めないファイルは除外
+    sources = [cv2.imread(path, cv2.IMREAD_COLOR) for path in source_paths]
+    sources = [image for image in sources if image is not None]
+    if count > 0 and not sources:
+        raise ValueError(f"元画像を読み込めません: {source_paths}")
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        image = augment_image(sources[i % len(sources)], rng)
+        cv2.imwrite(
+            str(output / f"aug_{i:05d}.jpg"), image, [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+        )
+
+    print(f"キャリブレーション画像を{count}枚生成しました: {output_dir}")
+
+
+def main() -> None:
+    """メイン処理"""
+    parser = argparse.ArgumentParser(
+        description="INT8量子化のキャリブレーション画像を水増し生成"
+    )
+    parser.add_argument(
+        "--source", "-s", nargs="+", required=True, help="元画像のパス（複数指定可）"
+    )
+    parser.add_argument(
+        "--output", "-o", default="calibration", help="出力先ディレクトリ"
+    )
+    parser.add_argument("--count", "-n", type=int, default=99, help="生成する画像数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+
+    args = parser.parse_args()
+
+    make_calibration_images(args.source, args.output, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+ONNXモデルのINT8静的量子化スクリプト（Dockerビルド時に実行）
+
+使い方:
+    python quantize_model.py --model best.onnx --output best_int8.onnx --calib-dir calibration
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import onnx
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from lambda_function import preprocess_image
+
+# キャリブレーションに使用する画像の拡張子
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class ImageCalibrationDataReader(CalibrationDataReader):
+    """キャリブレーション画像を推論時と同じ前処理で1枚ずつ返すデータリーダー"""
+
+    def __init__(self, image_paths: List[Path]):
+        self.image_paths = iter(image_paths)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for image_path in self.image_paths:
+            image = cv2.imread(str(image_path), cv2.IMREAD_COLOR)
+            if image is None:
+                print(f"スキップ（読み込み失敗）: {image_path}")
+                continue
+            # preprocess_imageは再利用バッファを返すためコピーして渡す
+            blob, _, _ = preprocess_image(image)
+            return {"images": blob.copy()}
+        return None
+
+
+def find_head_postprocess_nodes(model_path: str) -> List[str]:
+    """
+    Detect/Segmentヘッドの後処理ノード（DFL、アンカー加算、stride乗算、最終Concatなど）を取得
+
+    最終Concatはボックス座標 (0-640) とクラススコア (0-1) を1つのテンソルにまとめるため、
+    uint8の1つのスケールで量子化するとクラススコアが0に潰れる。
+    ヘッド内のConv（cv2 / cv3 / cv4 / proto）は量子化し、それ以降の後処理のみFP32で残す
+
+    Args:
+        model_path: ONNXモデルのパス
+
+    Returns:
+        List[str]: 量子化から除外するノード名のリスト
+    """
+    graph = onnx.load(model_path).graph
+    producers = {output: node for node in graph.node for output in node.output}
+
+    # output0を出力するノードの名前からヘッドのモジュール名を得る（例: "/model.22/Concat_6" -> "/model.22/"）
+    head_prefix = producers[graph.output[0].name].name.rsplit("/", 1)[0] + "/"
+
+    return [
+        node.name
+        for node in graph.node
+        if node.name.startswith(head_prefix)
+        and (
+            "/" not in node.name[len(head_prefix) :]
+            or node.name.startswith(head_prefix + "dfl/")
+        )
+    ]
+
+
+def quantize_model(
+    model_path: str, output_path: str, calib_dir: str, max_images: int = 100
+) -> None:
+    """
+    FP32のONNXモデルをINT8(QDQ形式)に静的量子化
+
+    Args:
+        model_path: FP32 ONNXモデルのパス
+        output_path: INT8 ONNXモデルの出力先パス
+        calib_dir: キャリブレーション画像のディレクトリ
+        max_images: キャリブレーションに使用する最大画像数
+    """
+    image_paths = sorted(
+        p for p in Path(calib_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+    )[:max_images]
+    if not image_paths:
+        print(f"エラー: キャリブレーション画像が見つかりません: {calib_dir}")
+        sys.exit(1)
+    print(f"キャリブレーション画像: {len(image_paths)}枚")
+
+    # 量子化前にシェイプ推論とグラフ最適化を適用
+    preprocessed_path = str(Path(output_path).with_suffix(".pre.onnx"))
+    quant_pre_process(model_path, preprocessed_path)
+
+    nodes_to_exclude = find_head_postprocess_nodes(preprocessed_path)
+    print(f"量子化から除外するヘッドの後処理ノード: {len(nodes_to_exclude)}個")
+
+    quantize_static(
+        preprocessed_path,
+        output_path,
+        ImageCalibrationDataReader(image_paths),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=nodes_to_exclude,
+    )
+    Path(preprocessed_path).unlink()
+
+    # クラス名などUltralyticsのメタデータを引き継ぐ
+    fp32_model = onnx.load(model_path)
+    int8_model = onnx.load(output_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, output_path)
+
+    print(f"INT8モデルを保存しました: {output_path}")
+
+
+def main() -> None:
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="ONNXモデルをINT8に静的量子化")
+    parser.add_argument(
+        "--model", "-m", default="best.onnx", help="FP32 ONNXモデルのパス"
+    )
+    parser.add_argument(
+        "--output", "-o", default="best_int8.onnx", help="INT8 ONNXモデルの出力先"
+    )
+    parser.add_argument(
+        "--calib-dir",
+        "-c",
+        default="calibration",
+        help="キャリブレーション画像のディレクトリ（100枚程度を推奨）",
+    )
+    parser.add_argument(
+        "--max-images", type=int, default=100, help="使用する最大画像数"
+    )
+
+    args = parser.parse_args()
+
+    quantize_model(args.model, args.output, args.calib_dir, args.max_images)
+
+
+if __name__ == "__main__":
+    main()
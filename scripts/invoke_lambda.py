@@ -6,6 +6,7 @@ Lambda関数を呼び出すテストスクリプト
     python invoke_lambda.py --image path/to/image.jpg
     python invoke_lambda.py --image path/to/image.jpg --save-result output.jpg
     python invoke_lambda.py --image path/to/image.jpg --function-name yolo-sample
+    python invoke_lambda.py --image path/to/image.jpg --s3-bucket your-bucket --save-result output.jpg
 """
 import argparse
 import base64
@@ -13,11 +14,39 @@ import json
 import sys
 import time
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 
 import boto3
+from botocore.config import Config
 from PIL import Image
 
+# リージョンごとのLambdaクライアント（クライアント作成とHTTPS接続を呼び出し間で再利用）
+_lambda_clients: Dict[str, Any] = {}
+
+
+def get_lambda_client(region: str = "ap-northeast-1"):
+    """
+    Lambdaクライアントを取得（リージョンごとに初回のみ作成）
+
+    Args:
+        region: AWSリージョン
+
+    Returns:
+        Lambda.Client: boto3のLambdaクライアント
+    """
+    if region not in _lambda_clients:
+        _lambda_clients[region] = boto3.client(
+            "lambda",
+            region_name=region,
+            config=Config(
+                max_pool_connections=50,
+                retries={"max_attempts": 1},
+                # コールドスタートを含むため、Lambdaのタイムアウトより長めに待つ
+                read_timeout=300,
+            ),
+        )
+    return _lambda_clients[region]
+
 
 def encode_image_to_base64(image_path: str) -> str:
     """
@@ -47,25 +76,69 @@ def decode_base64_to_image(base64_string: str, output_path: str) -> None:
         f.write(image_bytes)
 
 
+def upload_image_to_s3(
+    image_path: str, bucket: str, key: str, region: str = "ap-northeast-1"
+) -> None:
+    """
+    画像ファイルをS3にアップロード
+
+    Args:
+        image_path: 画像ファイルのパス
+        bucket: アップロード先のS3バケット
+        key: アップロード先のS3キー
+        region: AWSリージョン
+    """
+    s3_client = boto3.client("s3", region_name=region)
+    s3_client.upload_file(image_path, bucket, key)
+
+
+def download_image_from_s3(
+    bucket: str, key: str, output_path: str, region: str = "ap-northeast-1"
+) -> None:
+    """
+    S3の画像をファイルに保存
+
+    Args:
+        bucket: S3バケット
+        key: S3キー
+        output_path: 出力ファイルのパス
+        region: AWSリージョン
+    """
+    s3_client = boto3.client("s3", region_name=region)
+    s3_client.download_file(bucket, key, output_path)
+
+
 def invoke_lambda_function(
-    function_name: str, image_base64: str, region: str = "ap-northeast-1"
+    function_name: str,
+    image_base64: Optional[str],
+    region: str = "ap-northeast-1",
+    s3_bucket: Optional[str] = None,
+    s3_key: Optional[str] = None,
+    lambda_client=None,
 ) -> Tuple[Dict[str, Any], float]:
     """
     Lambda関数を呼び出す
 
     Args:
         function_name: Lambda関数名
-        image_base64: Base64エンコードされた画像文字列
+        image_base64: Base64エンコードされた画像文字列（S3経由の場合はNone）
         region: AWSリージョン
+        s3_bucket: 入力画像のS3バケット（指定時はS3経由で入出力）
+        s3_key: 入力画像のS3キー
+        lambda_client: boto3のLambdaクライアント（未指定時はget_lambda_clientで取得）
 
     Returns:
         Tuple[Dict[str, Any], float]: Lambda関数のレスポンスと実行時間（ミリ秒）
     """
-    # Lambda クライアントを作成
-    lambda_client = boto3.client("lambda", region_name=region)
+    # Lambda クライアントを取得
+    if lambda_client is None:
+        lambda_client = get_lambda_client(region)
 
     # リクエストペイロードを作成
-    payload = {"image": image_base64}
+    if s3_bucket:
+        payload = {"s3_bucket": s3_bucket, "s3_key": s3_key}
+    else:
+        payload = {"image": image_base64}
 
     # 実行時間の計測開始
     start_time = time.time()
@@ -106,6 +179,14 @@ def main() -> None:
         help="AWSリージョン (デフォルト: ap-northeast-1)",
     )
     parser.add_argument("--save-result", "-s", help="検出結果画像の保存先パス")
+    parser.add_argument(
+        "--s3-bucket",
+        help="S3経由で入出力する場合のバケット名（未指定時はBase64で送受信）",
+    )
+    parser.add_argument(
+        "--s3-key",
+        help="入力画像のS3キー (デフォルト: inputs/<画像ファイル名>)",
+    )
 
     args = parser.parse_args()
 
@@ -115,15 +196,24 @@ def main() -> None:
         print(f"エラー: 画像ファイルが見つかりません: {args.image}")
         sys.exit(1)
 
-    # 画像をBase64エンコード
-    image_base64 = encode_image_to_base64(str(image_path))
-
     # Lambda関数を呼び出し
     try:
+        if args.s3_bucket:
+            # 画像をS3にアップロード
+            s3_key = args.s3_key or f"inputs/{image_path.name}"
+            upload_image_to_s3(str(image_path), args.s3_bucket, s3_key, args.region)
+            image_base64 = None
+        else:
+            # 画像をBase64エンコード
+            s3_key = None
+            image_base64 = encode_image_to_base64(str(image_path))
+
         response, elapsed_ms = invoke_lambda_function(
             function_name=args.function_name,
             image_base64=image_base64,
             region=args.region,
+            s3_bucket=args.s3_bucket,
+            s3_key=s3_key,
         )
 
         # ステータスコードを確認
@@ -152,8 +242,16 @@ def main() -> None:
 
         # 検出結果画像を保存
         if args.save_result:
+            annotated_image_s3 = body.get("annotatedImageS3")
             annotated_image_base64 = body.get("annotatedImage")
-            if annotated_image_base64:
+            if annotated_image_s3:
+                download_image_from_s3(
+                    annotated_image_s3["bucket"],
+                    annotated_image_s3["key"],
+                    args.save_result,
+                    args.region,
+                )
+            elif annotated_image_base64:
                 decode_base64_to_image(annotated_image_base64, args.save_result)
 
         # Lambda実行時間と推論時間を表示
@@ -165,12 +263,19 @@ def main() -> None:
         if timing_breakdown:
             # 計測合計を先に計算
             total_measured = (
-                timing_breakdown.get("decode_ms", 0)
+                timing_breakdown.get("s3_download_ms", 0)
+                + timing_breakdown.get("decode_ms", 0)
                 + timing_breakdown.get("yolo_total_ms", 0)
+                + timing_breakdown.get("resize_ms", 0)
                 + timing_breakdown.get("encode_ms", 0)
+                + timing_breakdown.get("s3_upload_ms", 0)
                 + timing_breakdown.get("summary_ms", 0)
             )
             print(f"   Lambda内の計測: {total_measured:.2f} ms")
+            if "s3_download_ms" in timing_breakdown:
+                print(
+                    f"      S3ダウンロード: {timing_breakdown['s3_download_ms']:.2f} ms"
+                )
             print(
                 f"      Base64デコード: {timing_breakdown.get('decode_ms', 0):.2f} ms"
             )
@@ -182,9 +287,14 @@ def main() -> None:
             print(
                 f"         - 検出リスト作成: {timing_breakdown.get('detection_list_ms', 0):.2f} ms"
             )
+            print(f"      画像縮小: {timing_breakdown.get('resize_ms', 0):.2f} ms")
             print(
                 f"      Base64エンコード: {timing_breakdown.get('encode_ms', 0):.2f} ms"
             )
+            if "s3_upload_ms" in timing_breakdown:
+                print(
+                    f"      S3アップロード: {timing_breakdown['s3_upload_ms']:.2f} ms"
+                )
             print(f"      サマリー作成: {timing_breakdown.get('summary_ms', 0):.2f} ms")
 
             # 差分を計算
@@ -2,34 +2,102 @@
 """
 Lambda関数のパフォーマンス計測スクリプト
 
-31回実行してコールドスタート（1回目）を除いた30回分の平均値を計算
+31回実行してコールドスタート（1回目）を除いた30回分の平均値・中央値・p95を計算
 """
+import json
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 
 # invoke_lambda.pyと同じディレクトリにあるため、直接インポート
-from invoke_lambda import encode_image_to_base64, invoke_lambda_function
+from invoke_lambda import (
+    encode_image_to_base64,
+    get_lambda_client,
+    invoke_lambda_function,
+)
+
+# 計測項目（timing_breakdownのキー。elapsed_msのみクライアント側の計測値）
+METRIC_KEYS = [
+    "elapsed_ms",
+    "decode_ms",
+    "yolo_total_ms",
+    "inference_ms",
+    "plot_ms",
+    "detection_list_ms",
+    "resize_ms",
+    "encode_ms",
+    "summary_ms",
+]
+
+
+def run_once(
+    lambda_client,
+    function_name: str,
+    image_base64: str,
+    region: str
+) -> Optional[Tuple[float, Dict[str, float]]]:
+    """
+    Lambda関数を1回実行して計測値を取得
+
+    Args:
+        lambda_client: boto3のLambdaクライアント（スレッド間で共有）
+        function_name: Lambda関数名
+        image_base64: Base64エンコードされた画像文字列
+        region: AWSリージョン
+
+    Returns:
+        Optional[Tuple[float, Dict[str, float]]]: (実行時間（ミリ秒）, timing_breakdown)。失敗時はNone
+    """
+    try:
+        # Lambda関数を呼び出し
+        response, elapsed_ms = invoke_lambda_function(
+            function_name=function_name,
+            image_base64=image_base64,
+            region=region,
+            lambda_client=lambda_client
+        )
+
+        # ステータスコードを確認
+        status_code = response.get("statusCode", 500)
+        if status_code != 200:
+            print(f"\nエラー: Lambda関数がエラーを返しました (status code: {status_code})")
+            print(response)
+            return None
+
+        # レスポンスボディを解析
+        body = json.loads(response["body"])
+        return elapsed_ms, body.get("timing_breakdown", {})
+
+    except Exception as e:
+        print(f"\nエラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
 
 
 def run_measurements(
     image_path: str,
     function_name: str = "yolo-sample",
     region: str = "ap-northeast-1",
-    num_runs: int = 11
-) -> Dict[str, float]:
+    num_runs: int = 11,
+    concurrency: int = 1
+) -> Dict[str, Dict[str, float]]:
     """
-    Lambda関数を複数回実行して平均値を計算
+    Lambda関数を複数回実行して平均値・中央値・p95を計算
 
     Args:
         image_path: 入力画像のパス
         function_name: Lambda関数名
         region: AWSリージョン
         num_runs: 実行回数（デフォルト: 11回）
+        concurrency: 2回目以降の同時実行数（デフォルト: 1 = 逐次実行）
 
     Returns:
-        Dict[str, float]: 各計測項目の平均値
+        Dict[str, Dict[str, float]]: 統計量("mean", "p50", "p95")ごとの各計測項目の値
     """
     # 画像ファイルが存在するか確認
     image_file = Path(image_path)
@@ -41,126 +109,111 @@ def run_measurements(
     print(f"画像を読み込んでいます: {image_path}")
     image_base64 = encode_image_to_base64(str(image_file))
 
-    # 計測結果を格納するリスト
-    elapsed_times: List[float] = []
-    decode_times: List[float] = []
-    yolo_total_times: List[float] = []
-    inference_times: List[float] = []
-    plot_times: List[float] = []
-    detection_list_times: List[float] = []
-    encode_times: List[float] = []
-    summary_times: List[float] = []
-
-    print(f"\nLambda関数を{num_runs}回実行します...")
+    # 計測結果を格納する配列（1行 = 1回の実行、列 = METRIC_KEYS）
+    results = np.empty((num_runs, len(METRIC_KEYS)), dtype=np.float64)
+    valid = np.zeros(num_runs, dtype=bool)
+
+    print(f"\nLambda関数を{num_runs}回実行します（同時実行数: {concurrency}）...")
     print("=" * 60)
 
-    # Lambda関数を複数回実行
-    for i in range(num_runs):
-        run_number = i + 1
-        print(f"\n[{run_number}/{num_runs}] 実行中...", end="", flush=True)
-
-        try:
-            # Lambda関数を呼び出し
-            response, elapsed_ms = invoke_lambda_function(
-                function_name=function_name,
-                image_base64=image_base64,
-                region=region
-            )
-
-            # ステータスコードを確認
-            status_code = response.get("statusCode", 500)
-            if status_code != 200:
-                print(f"\nエラー: Lambda関数がエラーを返しました (status code: {status_code})")
-                print(response)
-                continue
-
-            # レスポンスボディを解析
-            import json
-            body = json.loads(response["body"])
-            timing_breakdown = body.get("timing_breakdown", {})
-
-            # 計測値を記録（1回目はスキップ）
-            if i > 0:  # 2回目以降のみ記録
-                elapsed_times.append(elapsed_ms)
-                decode_times.append(timing_breakdown.get('decode_ms', 0))
-                yolo_total_times.append(timing_breakdown.get('yolo_total_ms', 0))
-                inference_times.append(timing_breakdown.get('inference_ms', 0))
-                plot_times.append(timing_breakdown.get('plot_ms', 0))
-                detection_list_times.append(timing_breakdown.get('detection_list_ms', 0))
-                encode_times.append(timing_breakdown.get('encode_ms', 0))
-                summary_times.append(timing_breakdown.get('summary_ms', 0))
-
-            # 進捗表示
-            if i == 0:
-                print(" 完了（コールドスタート - 集計対象外）")
-            else:
-                print(f" 完了（{elapsed_ms:.2f} ms）")
-
-        except Exception as e:
-            print(f"\nエラーが発生しました: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            continue
+    # Lambdaクライアントは1つだけ作成し、全ての呼び出しで共有
+    lambda_client = get_lambda_client(region)
+
+    def run(i: int) -> Optional[Tuple[float, Dict[str, float]]]:
+        return run_once(lambda_client, function_name, image_base64, region)
+
+    def record(i: int, result: Optional[Tuple[float, Dict[str, float]]]) -> None:
+        if result is None:
+            return
+        elapsed_ms, timing_breakdown = result
+
+        # 計測値を記録（1回目は集計時に除外）
+        results[i, 0] = elapsed_ms
+        results[i, 1:] = [timing_breakdown.get(key, 0) for key in METRIC_KEYS[1:]]
+        valid[i] = True
+
+        # 進捗表示
+        if i == 0:
+            print(f"[1/{num_runs}] 完了（コールドスタート - 集計対象外）")
+        else:
+            print(f"[{i + 1}/{num_runs}] 完了（{elapsed_ms:.2f} ms）")
+
+    # 1回目（コールドスタート）は単独で実行
+    record(0, run(0))
+
+    # 2回目以降はスレッドプールで実行
+    # 同時実行数を増やすとLambdaが追加の実行環境を起動するため、その分はコールドスタートを含む
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, num_runs - 1), 1)) as executor:
+        for i, result in enumerate(executor.map(run, range(1, num_runs)), start=1):
+            record(i, result)
 
     print("\n" + "=" * 60)
 
-    # 平均値を計算
-    if not elapsed_times:
+    # 2回目以降の成功した実行のみを集計
+    valid[0] = False
+    warm_results = results[valid]
+    if len(warm_results) == 0:
         print("エラー: 有効な計測データがありません")
         sys.exit(1)
 
-    num_valid_runs = len(elapsed_times)
-    print(f"\n集計: {num_valid_runs}回の平均値を計算")
-
-    avg_elapsed = sum(elapsed_times) / num_valid_runs
-    avg_decode = sum(decode_times) / num_valid_runs
-    avg_yolo_total = sum(yolo_total_times) / num_valid_runs
-    avg_inference = sum(inference_times) / num_valid_runs
-    avg_plot = sum(plot_times) / num_valid_runs
-    avg_detection_list = sum(detection_list_times) / num_valid_runs
-    avg_encode = sum(encode_times) / num_valid_runs
-    avg_summary = sum(summary_times) / num_valid_runs
-
-    # Lambda内の計測合計
-    avg_total_measured = avg_decode + avg_yolo_total + avg_encode + avg_summary
-
-    # その他（オーバーヘッド等）
-    avg_other = avg_elapsed - avg_total_measured
-
-    return {
-        "elapsed_ms": avg_elapsed,
-        "total_measured_ms": avg_total_measured,
-        "decode_ms": avg_decode,
-        "yolo_total_ms": avg_yolo_total,
-        "inference_ms": avg_inference,
-        "plot_ms": avg_plot,
-        "detection_list_ms": avg_detection_list,
-        "encode_ms": avg_encode,
-        "summary_ms": avg_summary,
-        "other_ms": avg_other,
+    num_valid_runs = len(warm_results)
+    print(f"\n集計: {num_valid_runs}回の平均値・中央値・p95を計算")
+
+    stats = {
+        "mean": warm_results.mean(axis=0),
+        "p50": np.median(warm_results, axis=0),
+        "p95": np.percentile(warm_results, 95, axis=0),
     }
 
+    summaries = {}
+    for stat_name, values in stats.items():
+        summary = dict(zip(METRIC_KEYS, values.tolist()))
+
+        # Lambda内の計測合計
+        summary["total_measured_ms"] = (
+            summary["decode_ms"]
+            + summary["yolo_total_ms"]
+            + summary["resize_ms"]
+            + summary["encode_ms"]
+            + summary["summary_ms"]
+        )
+
+        # その他（オーバーヘッド等）
+        summary["other_ms"] = summary["elapsed_ms"] - summary["total_measured_ms"]
+
+        summaries[stat_name] = summary
+
+    return summaries
 
-def print_results(averages: Dict[str, float]) -> None:
+
+def print_results(summaries: Dict[str, Dict[str, float]]) -> None:
     """
     計測結果を階層的フォーマットで出力
 
     Args:
-        averages: 各計測項目の平均値
+        summaries: 統計量("mean", "p50", "p95")ごとの各計測項目の値
     """
+
+    def format_metric(key: str) -> str:
+        mean = summaries["mean"][key]
+        p50 = summaries["p50"][key]
+        p95 = summaries["p95"][key]
+        return f"{mean:.2f} ms (p50: {p50:.2f} ms, p95: {p95:.2f} ms)"
+
     print("\n" + "=" * 60)
-    print("計測結果（平均値）")
+    print("計測結果（平均値、カッコ内は中央値とp95）")
     print("=" * 60)
-    print(f"総処理時間: {averages['elapsed_ms']:.2f} ms")
-    print(f"   Lambda内の計測: {averages['total_measured_ms']:.2f} ms")
-    print(f"      Base64デコード: {averages['decode_ms']:.2f} ms")
-    print(f"      YOLO処理合計: {averages['yolo_total_ms']:.2f} ms")
-    print(f"         - 推論: {averages['inference_ms']:.2f} ms")
-    print(f"         - 結果描画: {averages['plot_ms']:.2f} ms")
-    print(f"         - 検出リスト作成: {averages['detection_list_ms']:.2f} ms")
-    print(f"      Base64エンコード: {averages['encode_ms']:.2f} ms")
-    print(f"      サマリー作成: {averages['summary_ms']:.2f} ms")
-    print(f"   その他（オーバーヘッド等）: {averages['other_ms']:.2f} ms")
+    print(f"総処理時間: {format_metric('elapsed_ms')}")
+    print(f"   Lambda内の計測: {format_metric('total_measured_ms')}")
+    print(f"      Base64デコード: {format_metric('decode_ms')}")
+    print(f"      YOLO処理合計: {format_metric('yolo_total_ms')}")
+    print(f"         - 推論: {format_metric('inference_ms')}")
+    print(f"         - 結果描画: {format_metric('plot_ms')}")
+    print(f"         - 検出リスト作成: {format_metric('detection_list_ms')}")
+    print(f"      画像縮小: {format_metric('resize_ms')}")
+    print(f"      Base64エンコード: {format_metric('encode_ms')}")
+    print(f"      サマリー作成: {format_metric('summary_ms')}")
+    print(f"   その他（オーバーヘッド等）: {format_metric('other_ms')}")
     print("=" * 60)
 
 
@@ -196,21 +249,29 @@ def main() -> None:
         default=31,
         help="実行回数（デフォルト: 31）"
     )
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=1,
+        help="2回目以降の同時実行数（デフォルト: 1）。2以上では追加の実行環境のコールドスタートが含まれる"
+    )
 
     args = parser.parse_args()
 
     # 計測実行
     start_time = time.time()
-    averages = run_measurements(
+    summaries = run_measurements(
         image_path=args.image,
         function_name=args.function_name,
         region=args.region,
-        num_runs=args.runs
+        num_runs=args.runs,
+        concurrency=args.concurrency
     )
     total_time = time.time() - start_time
 
     # 結果を表示
-    print_results(averages)
+    print_results(summaries)
     print(f"\n全体の実行時間: {total_time:.2f} 秒")
 
 